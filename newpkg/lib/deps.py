@@ -4,14 +4,14 @@ deps.py - dependency resolver for newpkg
 
 Features:
 - parse metafiles (YAML) from /usr/ports or explicit path
-- build dependency graph using networkx
+- build dependency graph (plain adjacency dicts)
 - interactive resolution of optional deps
 - export graph to JSON or DOT
 - persist cache to /var/lib/newpkg/depgraph.json
 - detect cycles, compute install/build order (topological sort)
 - detect orphans (compare graph with installed packages via db.sh)
 - integrate with hooks in /etc/newpkg/hooks/deps/
-- logging to /var/log/newpkg/deps.log
+- logging to /var/log/newpkg/deps.log (not for read-only commands; `deps.log_file: false` disables it)
 
 Usage:
   deps.py resolve <package>           # resolve and print full dependency list
@@ -21,13 +21,14 @@ Usage:
   deps.py check <package>             # check installed status of deps
   deps.py clean                       # depclean: remove orphaned deps suggestion
   deps.py rebuild <package>           # mark dependents for rebuild (prints list)
-  deps.py sync                        # rebuild graph cache from /usr/ports
+  deps.py sync [--full]               # rebuild graph cache from /usr/ports (incremental unless --full)
   deps.py export <file> --format json|dot
   deps.py help
 
 Notes:
-- Requires `PyYAML` and `networkx` Python packages.
-- Interacts with /usr/ports (search) and /var/lib/newpkg/db via db.sh CLI.
+- Requires `PyYAML`; `networkx` (plus pydot) is only needed for DOT export.
+- Interacts with /usr/ports (search) and /var/lib/newpkg/db via db.sh CLI
+  (the installed list is read straight from /var/lib/newpkg/db/index.json when present).
 """
 
 from __future__ import annotations
@@ -35,9 +36,13 @@ import argparse
 import json
 import logging
 import os
+import re
 import subprocess
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Set, Tuple, Optional
 
 try:
@@ -46,11 +51,17 @@ except Exception as e:
     print("Missing dependency: PyYAML (yaml). Install with `pip install pyyaml`.", file=sys.stderr)
     sys.exit(1)
 
+# prefer the libyaml C loader when PyYAML was built with it
 try:
-    import networkx as nx
-except Exception:
-    print("Missing dependency: networkx. Install with `pip install networkx`.", file=sys.stderr)
-    sys.exit(1)
+    from yaml import CSafeLoader as _YLoader
+except ImportError:
+    from yaml import SafeLoader as _YLoader
+
+# optional: orjson is a much faster (de)serializer for the graph cache and db.sh JSON
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Directories / files
 CONFIG_FILE = "/etc/newpkg/newpkg.yaml"
@@ -59,6 +70,14 @@ DEPGRAPH_CACHE = "/var/lib/newpkg/depgraph.json"
 LOG_DIR = "/var/log/newpkg"
 LOG_FILE = os.path.join(LOG_DIR, "deps.log")
 DB_CLI = "/usr/lib/newpkg/db.sh"  # path to db.sh CLI; adjust if different
+DB_INDEX = os.path.join(os.environ.get("NPKG_DB_DIR", "/var/lib/newpkg/db"), "index.json")  # what `db.sh list --json` prints
+PARALLEL_PARSE_MIN = 32  # below this many metafiles, parse serially (pool startup dominates)
+
+# node attributes written to the depgraph cache
+_PERSISTED_ATTRS = ("version", "origin", "provides", "optional")
+
+# leading package name of a dependency string: "libfoo >= 1.0" -> "libfoo"
+_NAME_RE = re.compile(r"\s*([A-Za-z0-9_.+-]+)")
 
 # Behavior defaults (can be overridden by CONFIG_FILE)
 DEFAULTS = {
@@ -69,25 +88,53 @@ DEFAULTS = {
     "prefer_binary": True,
     "prefer_cached_graph": True,
     "search_ports_paths": [PORTS_DIR],
+    "log_file": True,
 }
 
+# subcommands that never change state; they don't write to LOG_FILE
+READONLY_CMDS = ("resolve", "missing")
+
 # Ensure dirs
 os.makedirs(os.path.dirname(DEPGRAPH_CACHE), exist_ok=True)
-os.makedirs(LOG_DIR, exist_ok=True)
 
-# Logging
+# Logging (file handler is attached by _configure_logging)
 logger = logging.getLogger("newpkg-deps")
 logger.setLevel(logging.INFO)
-fh = logging.FileHandler(LOG_FILE)
 fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-fh.setFormatter(fmt)
-logger.addHandler(fh)
 # console handler
 ch = logging.StreamHandler()
 ch.setFormatter(fmt)
 logger.addHandler(ch)
 
 
+def _configure_logging(config: Dict, cmd: Optional[str]):
+    """
+    Attach the LOG_FILE handler, unless disabled with `deps.log_file: false`
+    or the subcommand is read-only.
+    """
+    if cmd in READONLY_CMDS or not config.get("log_file", True):
+        return
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        fh = logging.FileHandler(LOG_FILE)
+    except OSError as e:
+        logger.warning("Cannot open log file %s: %s", LOG_FILE, e)
+        return
+    fh.setFormatter(fmt)
+    logger.addHandler(fh)
+
+
+# JSON decoder for db.sh output and cache files (accepts str or bytes)
+_jloads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps(obj) -> bytes:
+    """Compact JSON encoding for machine-read cache files."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
 def run_hooks(hookname: str, *args):
     hooks_dir = f"/etc/newpkg/hooks/deps/{hookname}"
     if not os.path.isdir(hooks_dir):
@@ -95,20 +142,20 @@ def run_hooks(hookname: str, *args):
     for entry in sorted(os.listdir(hooks_dir)):
         path = os.path.join(hooks_dir, entry)
         if os.access(path, os.X_OK) and os.path.isfile(path):
-            logger.info(f"Running hook {hookname}: {path}")
+            logger.info("Running hook %s: %s", hookname, path)
             try:
                 subprocess.run([path] + list(args), check=False)
             except Exception as e:
-                logger.warning(f"Hook {path} failed: {e}")
+                logger.warning("Hook %s failed: %s", path, e)
 
 
 def load_yaml_config(path: str = CONFIG_FILE) -> Dict:
     if not os.path.isfile(path):
-        logger.info(f"No config at {path}, using defaults")
+        logger.info("No config at %s, using defaults", path)
         return DEFAULTS.copy()
     try:
         with open(path, "r") as f:
-            conf = yaml.safe_load(f) or {}
+            conf = yaml.load(f, Loader=_YLoader) or {}
             deps_conf = conf.get("deps", {})
             merged = DEFAULTS.copy()
             merged.update(deps_conf)
@@ -117,13 +164,14 @@ def load_yaml_config(path: str = CONFIG_FILE) -> Dict:
                 merged["search_ports_paths"] = conf.get("ports", {}).get("paths", [PORTS_DIR])
             return merged
     except Exception as e:
-        logger.error(f"Failed to parse config {path}: {e}")
+        logger.error("Failed to parse config %s: %s", path, e)
         return DEFAULTS.copy()
 
 
 def call_db_query(pkgname: str) -> Optional[Dict]:
     """
-    Calls db.sh query <pkg> --json and returns parsed JSON if installed
+    Calls db.sh query <pkg> --json and returns parsed JSON if installed.
+    Use DepResolver._installed_names() for plain installed checks.
     """
     try:
         # try by name (db.sh query <pkg> --json)
@@ -131,7 +179,7 @@ def call_db_query(pkgname: str) -> Optional[Dict]:
         if res.returncode == 0 and res.stdout.strip():
             # db.sh may output either a single manifest JSON or an array (index based)
             try:
-                parsed = json.loads(res.stdout)
+                parsed = _jloads(res.stdout)
                 # If it's an array, return first
                 if isinstance(parsed, list) and parsed:
                     return parsed[0]
@@ -142,7 +190,7 @@ def call_db_query(pkgname: str) -> Optional[Dict]:
                 return None
         return None
     except FileNotFoundError:
-        logger.warning(f"db CLI not found at {DB_CLI}; cannot check installed packages automatically.")
+        logger.warning("db CLI not found at %s; cannot check installed packages automatically.", DB_CLI)
         return None
 
 
@@ -161,189 +209,706 @@ def db_revdeps(pkgname: str) -> List[str]:
         return []
 
 
-def find_metafile_for_name(name: str) -> Optional[str]:
+def _iter_metafiles(roots, suffixes: Tuple[str, ...] = (".yaml", ".yml"), names: Tuple[str, ...] = ()):
+    """
+    Yield paths of files under `roots` whose name ends with one of `suffixes` (or equals one of `names`).
+    Uses os.scandir so file type comes from the cached DirEntry instead of extra stat calls.
+    Symlinked directories are not followed and unreadable directories are skipped, like os.walk.
+    """
+    stack = list(roots)
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif e.name.endswith(suffixes) or e.name in names:
+                        yield e.path
+        except OSError:
+            continue
+
+
+def find_metafile_for_name(name: str, index: Optional[Dict[str, str]] = None) -> Optional[str]:
     """
     Search /usr/ports tree for a meta file matching package name.
     Looks for files named meta.yaml, meta.yml, package.yaml etc., and tries to match .name
+    If a name -> path index is given it is consulted first and updated on a successful walk.
     """
-    exts = ("meta.yaml", "meta.yml", "meta.json", "meta")
-    for base in DEFAULTS["search_ports_paths"]:
-        for root, dirs, files in os.walk(base):
-            for fn in files:
-                if fn.lower().endswith((".yaml", ".yml", ".json", ".meta")) or fn in exts:
-                    path = os.path.join(root, fn)
-                    try:
-                        with open(path, "r") as fh:
-                            content = fh.read()
-                            try:
-                                if fn.endswith((".yaml", ".yml")):
-                                    parsed = yaml.safe_load(content)
-                                else:
-                                    # try json
-                                    parsed = json.loads(content)
-                            except Exception:
-                                parsed = None
-                            if isinstance(parsed, dict):
-                                n = parsed.get("name") or parsed.get("package") or parsed.get("pkgname")
-                                if n == name:
-                                    return path
-                    except Exception:
-                        continue
+    if index is not None:
+        hit = index.get(name)
+        if hit and os.path.isfile(hit):
+            return hit
+    for path in _iter_metafiles(DEFAULTS["search_ports_paths"], (".yaml", ".yml", ".json", ".meta"), ("meta",)):
+        try:
+            with open(path, "r") as fh:
+                content = fh.read()
+                try:
+                    if path.endswith((".yaml", ".yml")):
+                        parsed = yaml.load(content, Loader=_YLoader)
+                    else:
+                        # try json
+                        parsed = json.loads(content)
+                except Exception:
+                    parsed = None
+                if isinstance(parsed, dict):
+                    if _meta_name(parsed) == name:
+                        if index is not None:
+                            index[name] = path
+                        return path
+        except Exception:
+            continue
     return None
 
 
-def parse_metafile(path_or_name: str) -> Optional[Dict]:
+# metafile keys used by meta_to_record, as (wanted keys, stop keys, sub-mappings); everything else is
+# skipped by _parse_meta_fast. The scan ends once every stop key has a non-empty value: meta_to_record
+# reads `name or package or pkgname` and `depends or depends_on`, so an empty primary key must not hide a
+# later fallback.
+_META_KEYS = (
+    ("name", "package", "pkgname", "version", "origin", "provides"),
+    ("name", "version", "origin", "provides", "build", "runtime"),
+    {
+        "build": (("depends", "depends_on", "optional"), ("depends", "optional"), None),
+        "runtime": (("depends",), ("depends",), None),
+    },
+)
+
+_YRESOLVER = yaml.resolver.Resolver()
+_YCONSTRUCTOR = yaml.constructor.SafeConstructor()
+
+
+class _FastParseUnsupported(Exception):
+    """Raised when a metafile uses YAML features the event scanner does not handle."""
+
+
+def _yaml_scalar(ev) -> object:
+    tag = ev.tag
+    if tag is None or tag == "!":
+        tag = _YRESOLVER.resolve(yaml.ScalarNode, ev.value, ev.implicit)
+    ctor = yaml.constructor.SafeConstructor.yaml_constructors.get(tag)
+    if ctor is None:
+        raise _FastParseUnsupported(tag)
+    return ctor(_YCONSTRUCTOR, yaml.ScalarNode(tag, ev.value, style=ev.style))
+
+
+def _yaml_value(events, ev=None) -> object:
+    """Build the Python value for the node starting at `ev` (or the next event)."""
+    if ev is None:
+        ev = next(events)
+    if isinstance(ev, yaml.ScalarEvent):
+        return _yaml_scalar(ev)
+    if isinstance(ev, yaml.SequenceStartEvent):
+        out = []
+        for ev in events:
+            if isinstance(ev, yaml.SequenceEndEvent):
+                return out
+            out.append(_yaml_value(events, ev))
+    if isinstance(ev, yaml.MappingStartEvent):
+        out = {}
+        for ev in events:
+            if isinstance(ev, yaml.MappingEndEvent):
+                return out
+            key = _yaml_value(events, ev)
+            if key == "<<":
+                raise _FastParseUnsupported("merge key")
+            out[key] = _yaml_value(events)
+    # aliases (and truncated streams) need the full loader
+    raise _FastParseUnsupported(type(ev).__name__)
+
+
+def _yaml_skip(events):
+    """Consume the node starting at the next event without constructing it."""
+    ev = next(events)
+    if not isinstance(ev, yaml.CollectionStartEvent):
+        return
+    depth = 1
+    for ev in events:
+        if isinstance(ev, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(ev, yaml.CollectionEndEvent):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _yaml_drain(events):
+    """Consume events up to and including the end of the current collection."""
+    depth = 0
+    for ev in events:
+        if isinstance(ev, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(ev, yaml.CollectionEndEvent):
+            if depth == 0:
+                return
+            depth -= 1
+
+
+def _yaml_keys(events, spec, nested: bool = False) -> Dict:
+    """
+    Read a mapping whose MappingStartEvent was already consumed, keeping only the keys in `spec`
+    (see _META_KEYS). Stops as soon as every stop key has a non-empty value; a nested mapping is then
+    drained up to its end so the caller can keep reading its parent.
+    """
+    wanted, stop, sub = spec
+    sub = sub or {}
+    out = {}
+    remaining = set(stop)
+    for ev in events:
+        if isinstance(ev, yaml.MappingEndEvent):
+            break
+        if not isinstance(ev, yaml.ScalarEvent):
+            raise _FastParseUnsupported("complex key")
+        key = ev.value
+        if key == "<<":
+            raise _FastParseUnsupported("merge key")
+        if key in sub:
+            nxt = next(events)
+            if isinstance(nxt, yaml.MappingStartEvent):
+                out[key] = _yaml_keys(events, sub[key], nested=True)
+            else:
+                out[key] = _yaml_value(events, nxt)
+        elif key in wanted:
+            out[key] = _yaml_value(events)
+        else:
+            _yaml_skip(events)
+            continue
+        if out[key]:
+            remaining.discard(key)
+        if not remaining:
+            if nested:
+                _yaml_drain(events)
+            break
+    return out
+
+
+def _parse_meta_fast(path: str) -> Optional[Dict]:
+    """
+    Parse only the metafile keys meta_to_record needs, walking libyaml events
+    instead of constructing the whole document. Falls back to a full load on
+    YAML features the scanner does not handle (aliases, merge keys, custom tags).
+    Returns None if the document is not a mapping.
+
+    Because reading stops once the wanted keys are found, this is more lenient
+    than yaml.load: for a duplicated top-level key the first value wins (yaml.load
+    keeps the last one), and anything after the first document is never read, so
+    multi-document files are accepted instead of raising ComposerError.
+    """
+    try:
+        with open(path, "r") as fh:
+            events = yaml.parse(fh, Loader=_YLoader)
+            for ev in events:
+                if isinstance(ev, yaml.MappingStartEvent):
+                    return _yaml_keys(events, _META_KEYS)
+                if isinstance(ev, (yaml.NodeEvent, yaml.DocumentEndEvent)):
+                    return None
+            return None
+    except (yaml.YAMLError, _FastParseUnsupported, StopIteration):
+        with open(path, "r") as fh:
+            data = yaml.load(fh, Loader=_YLoader)
+        return data if isinstance(data, dict) else None
+
+
+def _meta_name(meta: Dict) -> Optional[str]:
+    # YAML may load names such as `name: 2048` as int; graph keys must be str to stay valid JSON
+    n = meta.get("name") or meta.get("package") or meta.get("pkgname")
+    return str(n) if n else None
+
+
+def parse_metafile(path_or_name: str, index: Optional[Dict[str, str]] = None, keys_only: bool = False) -> Optional[Dict]:
     """
     Accepts a path to a metafile or a package name. Returns parsed dict or None.
+    `index` is an optional name -> path map passed through to find_metafile_for_name.
+    With `keys_only`, YAML metafiles are read with _parse_meta_fast (only the keys meta_to_record uses).
     """
     path = path_or_name
     if not os.path.isfile(path_or_name):
         # try to find by name in ports tree
-        found = find_metafile_for_name(path_or_name)
+        found = find_metafile_for_name(path_or_name, index)
+        if found and index is not None and index.get(path_or_name) == found:
+            # the index is persisted across runs; make sure the file still defines this package
+            data = parse_metafile(found, keys_only=keys_only)
+            if data is not None and _meta_name(data) == path_or_name:
+                return data
+            logger.debug("Stale name index entry for '%s' (%s); searching ports tree.", path_or_name, found)
+            del index[path_or_name]
+            found = find_metafile_for_name(path_or_name, index)
         if not found:
-            logger.debug(f"Metafile for '{path_or_name}' not found in ports tree.")
+            logger.debug("Metafile for '%s' not found in ports tree.", path_or_name)
             return None
         path = found
     try:
-        with open(path, "r") as f:
-            if path.endswith((".yaml", ".yml")):
-                data = yaml.safe_load(f)
-            else:
-                # try YAML first anyway
-                try:
-                    data = yaml.safe_load(f)
-                except Exception:
-                    data = json.load(f)
+        if keys_only and path.endswith((".yaml", ".yml")):
+            data = _parse_meta_fast(path)
+        else:
+            with open(path, "r") as f:
+                if path.endswith((".yaml", ".yml")):
+                    data = yaml.load(f, Loader=_YLoader)
+                else:
+                    # try YAML first anyway
+                    try:
+                        data = yaml.load(f, Loader=_YLoader)
+                    except Exception:
+                        data = json.load(f)
         if not isinstance(data, dict):
-            logger.debug(f"Parsed metafile is not dict: {path}")
+            logger.debug("Parsed metafile is not dict: %s", path)
             return None
         # normalize structure
         # expected keys: name/version/build.depends/runtime.depends/provides/optional/environment
         return data
     except Exception as e:
-        logger.error(f"Failed to parse metafile {path}: {e}")
+        logger.error("Failed to parse metafile %s: %s", path, e)
+        return None
+
+
+def _intern(name):
+    """sys.intern package names so the graph holds one shared string per name."""
+    return sys.intern(name) if type(name) is str else name
+
+
+def _dep_name(it):
+    if isinstance(it, str):
+        # strip version constraints like libfoo>=1.0 -> libfoo
+        m = _NAME_RE.match(it)
+        return m.group(1) if m else ""
+    if isinstance(it, dict):
+        n = it.get("name")
+        return str(n) if n else ""
+    return ""
+
+
+def norm_list(lst) -> List[str]:
+    """
+    Flatten a metafile dependency list into bare package names.
+    Accepts strings (with optional version constraints) and {name: ...} mappings.
+    """
+    return [n for n in map(_dep_name, lst or ()) if n]
+
+
+def meta_to_record(meta: Dict) -> Optional[Tuple[str, Dict, List[str]]]:
+    """
+    Normalize a parsed metafile into (name, node_attrs, deps).
+    Returns None when the metafile has no name field.
+    """
+    name = _meta_name(meta)
+    if not name:
+        return None
+    # standardize dependency listing
+    build_deps = []
+    run_deps = []
+    optional = []
+    provides = meta.get("provides") or []
+    # gather build deps
+    b = meta.get("build", {}) or {}
+    if isinstance(b, dict):
+        build_deps = b.get("depends") or b.get("depends_on") or []
+        optional = b.get("optional") or optional
+    # run deps
+    r = meta.get("runtime", {}) or {}
+    if isinstance(r, dict):
+        run_deps = r.get("depends") or []
+    # optional deps recorded as node attribute for later interactive prompt
+    optional = norm_list(optional)
+    attrs = {"version": meta.get("version"), "origin": meta.get("origin", ""), "provides": provides, "optional": optional}
+    deps = list(set(norm_list([*build_deps, *run_deps])) - {name})
+    return name, attrs, deps
+
+
+def _parse_one(path: str) -> Optional[Tuple[str, Dict, List[str]]]:
+    """
+    Parse a single ports metafile into a graph record.
+    Runs inside ProcessPoolExecutor workers: no logging, no db.sh calls.
+    """
+    try:
+        doc = _parse_meta_fast(path)
+        return meta_to_record(doc) if doc else None
+    except Exception:
         return None
 
 
+def _kahn(nodes: Set[str], fwd: Dict[str, List[str]]) -> Tuple[Optional[List[str]], List[List[str]]]:
+    """
+    Topological sort (Kahn's algorithm) of adjacency `fwd` restricted to `nodes`;
+    edges leaving `nodes` are ignored, so no subgraph has to be built.
+    Returns (order, []) on success, or (None, cycles) where cycles are the
+    cyclic strongly connected components among the nodes left once the sort stalls.
+    """
+    indeg = dict.fromkeys(nodes, 0)
+    for u in nodes:
+        for v in fwd.get(u, ()):
+            if v in indeg:
+                indeg[v] += 1
+    queue = deque(n for n, d in indeg.items() if d == 0)
+    order = []
+    while queue:
+        u = queue.popleft()
+        order.append(u)
+        for v in fwd.get(u, ()):
+            if v in indeg:
+                indeg[v] -= 1
+                if indeg[v] == 0:
+                    queue.append(v)
+    if len(order) == len(nodes):
+        return order, []
+    done = set(order)
+    return None, _cyclic_sccs({n for n in nodes if n not in done}, fwd)
+
+
+def _sccs(nodes: Set[str], fwd: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Strongly connected components of adjacency `fwd` restricted to `nodes` (Tarjan).
+    Uses an explicit work stack, so deep dependency chains cannot hit the recursion limit.
+    """
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    sccs: List[List[str]] = []
+    counter = 0
+    for start in nodes:
+        if start in index:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(fwd.get(start, ())))]
+        while work:
+            v, it = work[-1]
+            descended = False
+            for w in it:
+                if w not in nodes:
+                    continue
+                if w not in index:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(fwd.get(w, ()))))
+                    descended = True
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                scc = []
+                while True:
+                    w = stack.pop()
+                    on_stack.discard(w)
+                    scc.append(w)
+                    if w == v:
+                        break
+                sccs.append(scc)
+    return sccs
+
+
+def _cyclic_sccs(nodes: Set[str], fwd: Dict[str, List[str]]) -> List[List[str]]:
+    """Components that form a dependency cycle: more than one node, or a node depending on itself."""
+    return [scc for scc in _sccs(nodes, fwd) if len(scc) > 1 or scc[0] in fwd.get(scc[0], ())]
+
+
 class DepResolver:
     def __init__(self, config: Dict, cache_path: str = DEPGRAPH_CACHE, aggressive_cache: bool = True):
         self.config = config
-        self.graph = nx.DiGraph()
+        # dependency graph: node -> deps, dep -> dependents, and per-node attributes.
+        # every node has a _fwd and _rev entry; dep-only nodes have no _attrs entry.
+        self._fwd: Dict[str, List[str]] = {}
+        self._rev: Dict[str, List[str]] = {}
+        self._attrs: Dict[str, Dict] = {}
+        # metafile path -> [st_mtime_ns, package name or None], for incremental sync
+        self._mtimes: Dict[str, List] = {}
         self.cache_path = cache_path
+        # package name -> metafile path, filled by build_graph_from_ports and persisted next to the cache
+        self._name_index: Dict[str, str] = {}
+        self.name_index_path = os.path.join(os.path.dirname(cache_path), "name_index.json")
         self.aggressive_cache = aggressive_cache and bool(self.config.get("cache_graph", True))
         self.loaded_from_cache = False
+        # installed packages from db.sh, fetched lazily (see _installed_records)
+        self._installed: Optional[List[Dict]] = None
+        self._installed_set: Optional[frozenset] = None
+        self._revdeps: Optional[Dict[str, List[str]]] = None
         if self.aggressive_cache:
             self._try_load_cache()
 
+    def _read_installed_index(self) -> Optional[List]:
+        """
+        Reads the db index file directly (same content as `db.sh list --json`).
+        Returns None if the index is missing or unreadable so callers can fall back to db.sh.
+        """
+        try:
+            with open(DB_INDEX, "rb") as fh:
+                parsed = _jloads(fh.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug("Could not read db index %s: %s", DB_INDEX, e)
+            return None
+        return parsed if isinstance(parsed, list) else None
+
+    def _installed_records(self) -> List[Dict]:
+        """
+        Returns the installed package records, read from the db index file or, failing
+        that, from `db.sh list --json`. Queried once per resolver instance; failures yield an empty list.
+        """
+        if self._installed is None:
+            self._installed = []
+            parsed = self._read_installed_index()
+            if parsed is None:
+                try:
+                    res = subprocess.run([DB_CLI, "list", "--json"], capture_output=True, text=True)
+                    if res.returncode != 0 or not res.stdout.strip():
+                        logger.warning("db.sh list returned no data or failed; cannot determine installed packages.")
+                    else:
+                        parsed = _jloads(res.stdout)
+                except FileNotFoundError:
+                    logger.warning("db CLI not found at %s; cannot check installed packages automatically.", DB_CLI)
+                except Exception:
+                    logger.warning("Failed to query db for installed packages.")
+            if isinstance(parsed, list):
+                self._installed = [it for it in parsed if isinstance(it, dict) and it.get("name")]
+        return self._installed
+
+    def _installed_names(self) -> frozenset:
+        if self._installed_set is None:
+            self._installed_set = frozenset(it["name"] for it in self._installed_records())
+        return self._installed_set
+
+    def _clear_graph(self):
+        self._fwd = {}
+        self._rev = {}
+        self._attrs = {}
+        self._mtimes = {}
+
+    def _drop_edges(self, name: str):
+        """
+        Remove a package's outgoing edges; deps left with no edges and no metadata are removed too.
+        """
+        for d in self._fwd.get(name, ()):
+            self._rev[d].remove(name)
+            if not self._rev[d] and not self._fwd[d] and not self._attrs.get(d):
+                del self._fwd[d], self._rev[d]
+                self._attrs.pop(d, None)
+        self._fwd[name] = []
+
+    def _remove_package(self, name: str):
+        """
+        Drop a package's metadata and outgoing edges. It stays as a bare node while other
+        packages still depend on it; deps left with no edges and no metadata are removed too.
+        """
+        self._drop_edges(name)
+        self._attrs.pop(name, None)
+        if not self._rev.get(name):
+            self._fwd.pop(name, None)
+            self._rev.pop(name, None)
+
+    def _to_nx(self):
+        """Build a networkx.DiGraph of the current graph (only needed for DOT export)."""
+        import networkx as nx
+        g = nx.DiGraph()
+        g.add_nodes_from((n, self._node_attrs(n)) for n in self._fwd)
+        g.add_edges_from((n, d) for n, deps in self._fwd.items() for d in deps)
+        return g
+
+    def _revdeps_index(self) -> Optional[Dict[str, List[str]]]:
+        """
+        Maps each name to the names of installed packages that depend on or provide it,
+        mirroring `db.sh revdeps` but built once from the installed records.
+        Returns None when the records carry no `depends` data, so callers fall back to db.sh.
+        """
+        if self._revdeps is None:
+            records = self._installed_records()
+            if not any("depends" in it for it in records):
+                return None
+            index: Dict[str, List[str]] = {}
+            for it in records:
+                depends = it.get("depends") or {}
+                targets = set()
+                if isinstance(depends, dict):
+                    for key in ("build", "run"):
+                        targets.update(t for t in depends.get(key) or () if isinstance(t, str))
+                targets.update(t for t in it.get("provides") or () if isinstance(t, str))
+                for t in targets:
+                    index.setdefault(t, []).append(it["name"])
+            self._revdeps = index
+        return self._revdeps
+
     def _try_load_cache(self):
         try:
             if os.path.isfile(self.cache_path):
-                with open(self.cache_path, "r") as fh:
-                    data = json.load(fh)
+                with open(self.cache_path, "rb") as fh:
+                    data = _jloads(fh.read())
                 # rebuild graph
-                self.graph.clear()
+                self._clear_graph()
+                self._mtimes = data.pop("__mtimes__", {})
+                fwd, rev = self._fwd, self._rev
                 for node, meta in data.items():
-                    self.graph.add_node(node, **meta.get("attrs", {}))
-                for node, meta in data.items():
-                    for dep in meta.get("deps", []):
-                        # dep is simple string (name)
-                        self.graph.add_edge(node, dep)
-                logger.info(f"Loaded dependency graph cache from {self.cache_path}")
+                    node = _intern(node)
+                    if meta.get("attrs"):
+                        self._attrs[node] = meta["attrs"]
+                    # deps are simple strings (names)
+                    fwd[node] = [_intern(d) for d in meta.get("deps", [])]
+                    if node not in rev:
+                        rev[node] = []
+                    for dep in fwd[node]:
+                        if dep in rev:
+                            rev[dep].append(node)
+                        else:
+                            rev[dep] = [node]
+                            if dep not in fwd:
+                                fwd[dep] = []
+                logger.info("Loaded dependency graph cache from %s", self.cache_path)
                 self.loaded_from_cache = True
         except Exception as e:
-            logger.warning(f"Failed to load depgraph cache: {e}")
+            logger.warning("Failed to load depgraph cache: %s", e)
             self.loaded_from_cache = False
+        try:
+            if os.path.isfile(self.name_index_path):
+                with open(self.name_index_path, "rb") as fh:
+                    data = _jloads(fh.read())
+                if isinstance(data, dict):
+                    self._name_index = {_intern(k): v for k, v in data.items()}
+        except Exception as e:
+            logger.warning("Failed to load metafile name index: %s", e)
+
+    def _node_attrs(self, n: str, keys: Optional[Tuple[str, ...]] = None) -> Dict:
+        a = self._attrs.get(n, {})
+        if keys is None:
+            return a
+        return {k: a[k] for k in keys if k in a}
+
+    def _write_graph_json(self, fh, keys: Optional[Tuple[str, ...]] = None, extra: Optional[Dict] = None):
+        """
+        Stream the graph to binary file `fh` as {name: {"attrs": ..., "deps": [...]}, ...},
+        one node at a time instead of building the whole document first.
+        `keys` limits the attrs written; `extra` adds top-level entries after the nodes.
+        """
+        fh.write(b"{")
+        sep = b""
+        for n, deps in self._fwd.items():
+            fh.write(sep + _dumps(n) + b":" + _dumps({"attrs": self._node_attrs(n, keys), "deps": deps}))
+            sep = b","
+        for k, v in (extra or {}).items():
+            fh.write(sep + _dumps(k) + b":" + _dumps(v))
+            sep = b","
+        fh.write(b"}")
 
     def persist_cache(self):
         try:
-            out = {}
-            for n in self.graph.nodes:
-                attrs = dict(self.graph.nodes[n])
-                deps = list(self.graph.successors(n))
-                out[n] = {"attrs": attrs, "deps": deps}
             tmp = self.cache_path + ".tmp"
-            with open(tmp, "w") as fh:
-                json.dump(out, fh, indent=2)
+            with open(tmp, "wb") as fh:
+                self._write_graph_json(fh, _PERSISTED_ATTRS, {"__mtimes__": self._mtimes})
             os.replace(tmp, self.cache_path)
-            logger.info(f"Persisted dependency graph to {self.cache_path}")
+            tmp = self.name_index_path + ".tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(_dumps(self._name_index))
+            os.replace(tmp, self.name_index_path)
+            logger.info("Persisted dependency graph to %s", self.cache_path)
         except Exception as e:
-            logger.error(f"Failed to persist cache: {e}")
+            logger.error("Failed to persist cache: %s", e)
+
+    def _add_record(self, rec: Tuple[str, Dict, List[str]]) -> str:
+        name, attrs, deps = rec
+        # records may come back from worker processes, so intern here rather than at parse time
+        name = _intern(name)
+        deps = [_intern(d) for d in deps]
+        # add node and edges: node -> deps (edges node -> dep); for topological sort we may want reverse, but stick with this (successor = dependency)
+        fwd, rev = self._fwd, self._rev
+        self._attrs[name] = attrs
+        old = fwd.get(name)
+        if old is not None and set(old) == set(deps):
+            # common on resync: metadata changed but edges did not
+            return name
+        # re-adding a package replaces its previous edges
+        if old:
+            self._drop_edges(name)
+        fwd[name] = deps
+        if name not in rev:
+            rev[name] = []
+        # fwd and rev always hold the same keys, so one membership test covers both
+        for d in deps:
+            if d in rev:
+                rev[d].append(name)
+            else:
+                fwd[d] = []
+                rev[d] = [name]
+        return name
 
     def add_package_from_metafile(self, path_or_name: str) -> Optional[str]:
-        meta = parse_metafile(path_or_name)
+        meta = parse_metafile(path_or_name, self._name_index, keys_only=True)
         if not meta:
-            logger.debug(f"No metafile parsed for {path_or_name}")
+            logger.debug("No metafile parsed for %s", path_or_name)
             return None
-        name = meta.get("name") or meta.get("package") or meta.get("pkgname")
-        if not name:
-            logger.warning(f"No name field in metafile {path_or_name}")
+        rec = meta_to_record(meta)
+        if not rec:
+            logger.warning("No name field in metafile %s", path_or_name)
             return None
-        # standardize dependency listing
-        build_deps = []
-        run_deps = []
-        optional = []
-        provides = meta.get("provides") or []
-        # gather build deps
-        b = meta.get("build", {}) or {}
-        if isinstance(b, dict):
-            build_deps = b.get("depends") or b.get("depends_on") or []
-            optional = b.get("optional") or optional
-        # run deps
-        r = meta.get("runtime", {}) or {}
-        if isinstance(r, dict):
-            run_deps = r.get("depends") or []
-        # flatten and normalize strings
-        def norm_list(lst):
-            out = []
-            if not lst:
-                return out
-            for it in lst:
-                if isinstance(it, str):
-                    # strip version constraints like libfoo>=1.0 -> libfoo
-                    out.append(it.split()[0].split(">=")[0].split("<=")[0].split("==")[0].split(">")[0].split("<")[0])
-                elif isinstance(it, dict) and "name" in it:
-                    out.append(it["name"])
-            return out
-        build_deps = norm_list(build_deps)
-        run_deps = norm_list(run_deps)
-        optional = norm_list(optional)
-        # add node and edges: node -> deps (edges node -> dep); for topological sort we may want reverse, but stick with this (successor = dependency)
-        self.graph.add_node(name, version=meta.get("version"), origin=meta.get("origin", ""), provides=provides, optional=optional)
-        # add edges
-        for d in set(build_deps + run_deps):
-            if d == name:
-                continue
-            self.graph.add_node(d)
-            self.graph.add_edge(name, d)
-        # optional deps recorded as node attribute for later interactive prompt
-        if optional:
-            self.graph.nodes[name]["optional"] = optional
-        return name
+        return self._add_record(rec)
 
     def build_graph_from_ports(self):
         """
-        Walk ports tree and parse each metafile (may be slow). Uses parse_metafile.
+        Walk ports tree and parse each new or modified metafile (may be slow).
+        Metafiles whose mtime matches the cache are skipped; packages whose metafile
+        disappeared are removed. Files are parsed in worker processes; only this
+        process mutates the graph.
         """
         run_hooks("pre-deps-sync")
         logger.info("Scanning ports tree to build dependency graph...")
-        count = 0
-        for base in self.config.get("search_ports_paths", [PORTS_DIR]):
-            for root, dirs, files in os.walk(base):
-                for fn in files:
-                    if fn.lower().endswith((".yaml", ".yml")):
-                        full = os.path.join(root, fn)
-                        try:
-                            with open(full, "r") as fh:
-                                doc = yaml.safe_load(fh)
-                            if isinstance(doc, dict):
-                                # attempt to add
-                                name = doc.get("name") or doc.get("package") or doc.get("pkgname")
-                                if name:
-                                    self.add_package_from_metafile(full)
-                                    count += 1
-                        except Exception:
-                            continue
-        logger.info(f"Scanned ports tree, added {count} packages to graph")
+        paths = list(_iter_metafiles(self.config.get("search_ports_paths", [PORTS_DIR])))
+        seen = set(paths)
+        for path in [p for p in self._mtimes if p not in seen]:
+            old = self._mtimes.pop(path)[1]
+            if old and self._name_index.get(old) == path:
+                self._remove_package(old)
+                del self._name_index[old]
+        changed = []
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._mtimes.get(path)
+            if cached and cached[0] == mtime and (cached[1] is None or cached[1] in self._attrs):
+                continue
+            changed.append((path, mtime))
+        queued = {p for p, _ in changed}
+
+        def apply(path, mtime, rec):
+            old = self._mtimes.get(path, [None, None])[1]
+            if old and (not rec or rec[0] != old) and self._name_index.get(old) == path:
+                # metafile no longer defines this package
+                self._remove_package(old)
+                del self._name_index[old]
+                # another (unchanged) metafile may still define it: parse that one again
+                for p, (mt, n) in self._mtimes.items():
+                    if n == old and p not in queued and p in seen:
+                        changed.append((p, mt))
+                        queued.add(p)
+            name = self._add_record(rec) if rec else None
+            if name:
+                self._name_index[name] = path
+            self._mtimes[path] = [mtime, name]
+
+        done = 0
+        if len(changed) >= PARALLEL_PARSE_MIN:
+            try:
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+                    for (path, mtime), rec in zip(changed, ex.map(_parse_one, [p for p, _ in changed], chunksize=64)):
+                        apply(path, mtime, rec)
+                        done += 1
+            except (OSError, ImportError, NotImplementedError, BrokenProcessPool) as e:
+                # e.g. no working sem_open in a chroot without /dev/shm, or a worker was OOM-killed
+                logger.warning("Parallel metafile parsing unavailable (%s); continuing serially", e)
+        # serial path for small syncs, for whatever the pool did not get to and for re-queued paths
+        while done < len(changed):
+            path, mtime = changed[done]
+            apply(path, mtime, _parse_one(path))
+            done += 1
+        logger.info("Scanned ports tree, parsed %d of %d metafiles; graph has %d packages", len(changed), len(paths), len(self._attrs))
         run_hooks("post-deps-sync")
         if self.config.get("cache_graph", True):
             self.persist_cache()
@@ -354,11 +919,11 @@ class DepResolver:
         Returns (resolved_list_in_topo_order, cycles_list)
         If optional deps exist, ask interactively (include_optional_prompt).
         """
-        if root_pkg not in self.graph.nodes:
+        if root_pkg not in self._fwd:
             # try to add from metafile (search ports)
             added = self.add_package_from_metafile(root_pkg)
             if not added:
-                logger.warning(f"Package '{root_pkg}' not found in graph or ports tree.")
+                logger.warning("Package '%s' not found in graph or ports tree.", root_pkg)
                 return [], []
         # collect all dependencies via DFS
         deps_set: Set[str] = set()
@@ -372,13 +937,13 @@ class DepResolver:
                 continue
             visited.add(cur)
             # dependencies are successors in this graph (node -> dep)
-            for dep in self.graph.successors(cur):
+            for dep in self._fwd.get(cur, ()):
                 if dep == cur:
                     continue
                 deps_set.add(dep)
                 stack.append(dep)
             # collect optional if present
-            opt = self.graph.nodes[cur].get("optional") or []
+            opt = self._attrs.get(cur, {}).get("optional") or []
             if opt:
                 optional_to_ask[cur] = opt
 
@@ -395,37 +960,28 @@ class DepResolver:
                     if ans in ("y", "yes"):
                         selected_optional.add(o)
                         # add to graph if not present ( attempt to parse metafile )
-                        if o not in self.graph.nodes:
+                        if o not in self._fwd:
                             self.add_package_from_metafile(o)
                         # add transitive deps of that optional
                         stack = [o]
                         while stack:
                             c = stack.pop()
-                            for dep in self.graph.successors(c):
+                            for dep in self._fwd.get(c, ()):
                                 if dep not in deps_set:
                                     deps_set.add(dep)
                                     stack.append(dep)
 
-        # Now we have set of deps; build subgraph with root_pkg + deps_set
+        # Now we have set of deps; sort root_pkg + deps_set in place (no subgraph copy)
         sub_nodes = set(deps_set)
         sub_nodes.add(root_pkg)
-        subg = self.graph.subgraph(sub_nodes).copy()
-        # detect cycles
-        cycles = list(nx.simple_cycles(subg))
+        # detect cycles and compute topological order in one pass
+        topo, cycles = _kahn(sub_nodes, self._fwd)
         if cycles:
-            logger.error(f"Dependency cycles detected: {cycles}")
+            logger.error("Dependency cycles detected: %s", cycles)
             return [], [','.join(c) for c in cycles]
-        # compute topological order: ensure dependencies come before dependents for build ordering we need reverse topological
-        try:
-            topo = list(nx.topological_sort(subg))
-            # For build order: build dependencies first; we want order where dependencies appear before dependents.
-            # topological_sort gives that: nodes with no incoming edges first (leaves), but our edges are node->dep, so edges from package to its dep.
-            # To get build order we actually need reverse of topological_sort (so dependencies first):
-            build_order = topo[::-1]
-        except Exception as e:
-            logger.error(f"Topological sort failed: {e}")
-            return [], []
-        return build_order, []
+        # Kahn's order puts dependents before their deps (edges are package -> dep),
+        # so reverse it to get build order (dependencies first)
+        return topo[::-1], []
 
     def missing_deps(self, root_pkg: str) -> List[str]:
         """
@@ -440,8 +996,7 @@ class DepResolver:
             # skip the root package itself
             if pkg == root_pkg:
                 continue
-            installed = call_db_query(pkg)
-            if not installed:
+            if pkg not in self._installed_names():
                 missing.append(pkg)
         return missing
 
@@ -452,17 +1007,17 @@ class DepResolver:
         order, cycles = self.resolve(root_pkg, include_optional_prompt=False)
         if cycles:
             raise RuntimeError(f"Cycles detected: {cycles}")
+        installed = self._installed_names() if skip_installed else frozenset()
         final = []
         for pkg in order:
             if pkg == root_pkg:
                 continue
-            if skip_installed:
-                if call_db_query(pkg):
-                    logger.debug(f"Skipping installed package {pkg}")
-                    continue
+            if pkg in installed:
+                logger.debug("Skipping installed package %s", pkg)
+                continue
             final.append(pkg)
         # finally append root_pkg if not installed
-        if not (skip_installed and call_db_query(root_pkg)):
+        if root_pkg not in installed:
             final.append(root_pkg)
         return final
 
@@ -472,30 +1027,14 @@ class DepResolver:
         Uses db.sh to list installed packages.
         """
         # get list from db: db.sh list --json
-        try:
-            res = subprocess.run([DB_CLI, "list", "--json"], capture_output=True, text=True)
-            if res.returncode != 0 or not res.stdout.strip():
-                logger.warning("db.sh list returned no data or failed; cannot detect orphans.")
-                return []
-            installed = json.loads(res.stdout)
-            installed_names = [it.get("name") for it in installed if isinstance(it, dict) and it.get("name")]
-        except Exception:
-            logger.warning("Failed to query db for installed packages.")
-            installed_names = []
-
-        # build reverse-dependency map from graph: who depends on whom?
-        revdeps_map = {}
-        for node in self.graph.nodes:
-            revdeps_map[node] = set()
-        for src, dst in self.graph.edges:
-            # src depends on dst
-            revdeps_map.setdefault(dst, set()).add(src)
+        installed_names = [it["name"] for it in self._installed_records()]
+        if not installed_names:
+            return []
 
         orphans = []
         for name in installed_names:
             # if no one depends on it and it's not in our graph as a dependency of anything
-            deps_of_me = revdeps_map.get(name, set())
-            if not deps_of_me:
+            if not self._rev.get(name):
                 orphans.append(name)
         return orphans
 
@@ -505,61 +1044,58 @@ class DepResolver:
         Uses db_revdeps (db.sh revdeps) as authoritative and also graph traversal.
         Returns list of package names to rebuild (ordered: deepest dependents first).
         """
-        # try db_revdeps first
-        revdeps_from_db = db_revdeps(pkg)
-        # revdeps_from_db are name-version strings; strip version to get name
-        parsed = [r.split("-", 1)[0] for r in revdeps_from_db]
-        # also use graph traversal
-        dependents = set()
-        if pkg in self.graph.nodes:
-            # nodes that have a path from node -> ... -> pkg? but our edges are node->dep (source depends on dest),
-            # so we need nodes that can reach 'pkg' via edges: find predecessors repeatedly
-            for n in self.graph.nodes:
-                if nx.has_path(self.graph, n, pkg):
-                    dependents.add(n)
+        # try db revdeps first (from the installed index, or db.sh revdeps if it lacks depends data)
+        index = self._revdeps_index()
+        if index is not None:
+            parsed = index.get(pkg, [])
+        else:
+            # db.sh prints name-version strings; strip version to get name
+            parsed = [r.split("-", 1)[0] for r in db_revdeps(pkg)]
+        # also use graph traversal: edges are node->dep (source depends on dest), so walk
+        # the reverse adjacency once from pkg, recording each dependent's distance
+        dist = {pkg: 0}
+        queue = deque([pkg])
+        while queue:
+            cur = queue.popleft()
+            for p in self._rev.get(cur, ()):
+                if p not in dist:
+                    dist[p] = dist[cur] + 1
+                    queue.append(p)
+        dependents = set(dist)
+        dependents.discard(pkg)
         dependents.update(parsed)
         # order: we want to rebuild dependencies of dependents first? Typically rebuild dependents after rebuilding pkg.
-        # produce list sorted by distance from pkg descending (closest dependents first)
-        try:
-            distances = {}
-            for d in dependents:
-                try:
-                    distances[d] = nx.shortest_path_length(self.graph, d, pkg)
-                except Exception:
-                    distances[d] = 0
-            ordered = sorted(list(dependents), key=lambda x: distances.get(x, 0), reverse=True)
-        except Exception:
-            ordered = list(dependents)
-        return ordered
+        # produce list sorted by distance from pkg descending (db-only revdeps count as 0)
+        return sorted(dependents, key=lambda x: dist.get(x, 0), reverse=True)
 
     def export_graph(self, out_path: str, fmt: str = "json"):
         if fmt == "json":
-            out = {}
-            for n in self.graph.nodes:
-                out[n] = {
-                    "attrs": dict(self.graph.nodes[n]),
-                    "deps": list(self.graph.successors(n))
-                }
-            with open(out_path, "w") as fh:
-                json.dump(out, fh, indent=2)
-            logger.info(f"Graph exported to {out_path} (json)")
+            with open(out_path, "wb") as fh:
+                self._write_graph_json(fh)
+            logger.info("Graph exported to %s (json)", out_path)
         elif fmt == "dot":
             try:
                 from networkx.drawing.nx_pydot import write_dot
             except Exception:
-                logger.error("dot export requires pydot or pygraphviz; ensure they are installed.")
+                logger.error("dot export requires networkx with pydot or pygraphviz; ensure they are installed.")
                 raise
-            write_dot(self.graph, out_path)
-            logger.info(f"Graph exported to {out_path} (dot)")
+            write_dot(self._to_nx(), out_path)
+            logger.info("Graph exported to %s (dot)", out_path)
         else:
-            logger.error("Unsupported format: " + fmt)
+            logger.error("Unsupported format: %s", fmt)
             raise ValueError("Unsupported format")
 
-    def sync_from_ports(self):
+    def sync_from_ports(self, full: bool = False):
         """
-        Rebuild graph by scanning ports tree (forced).
+        Resync graph from the ports tree. Only changed metafiles are reparsed unless
+        `full` is set or the loaded cache has no mtime data.
         """
-        self.graph = nx.DiGraph()
+        if full or not self._mtimes:
+            self._clear_graph()
+            self._name_index = {}
+        self._installed = None
+        self._installed_set = None
+        self._revdeps = None
         self.build_graph_from_ports()
         if self.config.get("cache_graph", True):
             self.persist_cache()
@@ -592,10 +1128,12 @@ def main_cli():
     sub.rebuild.add_argument("package", help="package name")
 
     sub.sync = sub.add_parser("sync", help="Rebuild/resync graph cache from ports tree")
+    sub.sync.add_argument("--full", action="store_true", help="reparse every metafile instead of only changed ones")
 
     args = parser.parse_args()
 
     config = load_yaml_config(CONFIG_FILE)
+    _configure_logging(config, args.cmd)
     resolver = DepResolver(config, cache_path=DEPGRAPH_CACHE, aggressive_cache=config.get("prefer_cached_graph", True))
 
     if args.cmd == "resolve":
@@ -615,7 +1153,7 @@ def main_cli():
             order = resolver.install_order(args.package, skip_installed=skip_inst)
             print("\n".join(order))
         except Exception as e:
-            logger.error(str(e))
+            logger.error("%s", e)
             sys.exit(1)
     elif args.cmd == "missing":
         miss = resolver.missing_deps(args.package)
@@ -629,7 +1167,7 @@ def main_cli():
         try:
             resolver.export_graph(out, fmt)
         except Exception as e:
-            logger.error(f"Failed to export graph: {e}")
+            logger.error("Failed to export graph: %s", e)
             sys.exit(1)
     elif args.cmd == "check":
         run_hooks("pre-deps-resolve", args.package)
@@ -660,7 +1198,7 @@ def main_cli():
         else:
             print("No dependents detected.")
     elif args.cmd == "sync":
-        resolver.sync_from_ports()
+        resolver.sync_from_ports(full=args.full)
         print("Graph rebuilt and cached.")
     else:
         parser.print_help()